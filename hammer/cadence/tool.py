@@ -1,15 +1,84 @@
-from functools import reduce
-from typing import List, Optional, Dict, Any, Callable
+from typing import List, Optional, Dict, Any, Callable, Iterable, TypeVar
 import os
 import json
-import copy
+import filecmp
 import inspect
 
 from hammer.vlsi import HammerTool, HasSDCSupport, HasCPFSupport, HasUPFSupport, TCLTool, ILMStruct
 from hammer.vlsi.constraints import MMMCCorner, MMMCCornerType
-from hammer.utils import optional_map, add_dicts
+from hammer.utils import optional_map
 import hammer.tech as hammer_tech
 
+T = TypeVar("T")
+
+# Commands that set up one MMMC corner, from its library set through to its analysis view.
+_MMMC_CORNER_TEMPLATE = """create_library_set -name {name}_set -timing [list {libs}]
+create_timing_condition -name {name}_cond -library_sets [list {name}_set]
+create_rc_corner -name {name}_rc -temperature {tempInCelsius} {qrc}
+create_delay_corner -name {name}_delay -timing_condition {name}_cond -rc_corner {name}_rc
+create_analysis_view -name {name}_view -delay_corner {name}_delay -constraint_mode {constraint}"""
+
+# Escapes Tcl command substitution brackets so that a command can be echoed with puts.
+_TCL_BRACKET_ESCAPES = str.maketrans({"[": "\\[", "]": "\\]"})
+
+# Sets a cell as dont_use if it exists, and warns otherwise.
+_DONT_USE_TEMPLATE = """
+puts "set_dont_use {get_db_str_escaped}"
+if {{ {get_db_str} ne "" }} {{
+    set_dont_use {get_db_str}
+}} else {{
+    puts "WARNING: cell {mapped_cell} was not found for set_dont_use"
+}}
+            """
+
+# Writes the sequential cells to find_regs_cells.json and the register output pins to find_regs_paths.txt.
+_WRITE_REGS_TCL = '''
+        set refs [get_db [get_db lib_cells -if .is_sequential==true] .base_name]
+
+        # Build the whole JSON list in memory and write it with a single puts.
+        if {[llength $refs] > 0} {
+            set cells_json "\\[\\n    \\"[join $refs "\\",\\n    \\""]\\"\\n\\]"
+        } else {
+            set cells_json "\\[\\n\\]"
+        }
+        # Each file is written under a temporary name and renamed into place, so it is never seen half-written.
+        set write_cells_ir [open "./find_regs_cells.json.tmp" "w"]
+        puts $write_cells_ir $cells_json
+        close $write_cells_ir
+        file rename -force ./find_regs_cells.json.tmp ./find_regs_cells.json
+        # The register paths are written one per line; process_reg_paths turns them into find_regs_paths.json.
+        set write_regs_ir [open "./find_regs_paths.txt.tmp" "w"]
+
+        set regs [get_db [get_db [all_registers -edge_triggered -output_pins] -if .direction==out] .name]
+
+        if {[llength $regs] > 0} {
+            puts $write_regs_ir [join $regs "\\n"]
+        }
+
+        close $write_regs_ir
+        file rename -force ./find_regs_paths.txt.tmp ./find_regs_paths.txt
+        '''
+
+def _reg_path_to_dict(reg_path: str) -> Dict[str, str]:
+    """
+    Split a register output pin path from find_regs_paths.txt into its escaped instance path and pin.
+
+    :param reg_path: Path of the register output pin, e.g. "top/core/r_reg[0]/Q"
+    :return: Dictionary with the "path" of the register instance and its "pin"
+    """
+    reg_dir, _, pin = reg_path.rpartition("/")
+    # If the net is part of a generate block, the generated names have a "." in them and the whole name
+    # needs to be escaped.
+    if "." in reg_dir:
+        reg_dir = "/".join("\\" + node + "\\" if "." in node else node for node in reg_dir.split("/"))
+    if "." in pin:
+        pin = "\\" + pin + "\\"
+    # If the last net is part of a bus, it needs to be escaped
+    if reg_dir.endswith("]"):
+        parent, sep, last = reg_dir.rpartition("/")
+        reg_dir = parent + sep + "\\" + last
+    return {"path" : reg_dir, "pin" : pin}
+
 class CadenceTool(HasSDCSupport, HasCPFSupport, HasUPFSupport, TCLTool, HammerTool):
     """Mix-in trait with functions useful for Cadence-based tools."""
 
@@ -26,21 +95,73 @@ class CadenceTool(HasSDCSupport, HasCPFSupport, HasUPFSupport, TCLTool, HammerTo
         except KeyError:
             list_of_vars = []
 
-        cadence_vars = {
+        # Merge left to right in a single dict so that later entries win, without an intermediate dict per step.
+        env = {}  # type: Dict[str, str]
+        env.update(super().env_vars)
+        for extra_vars in list_of_vars:
+            env.update(extra_vars)
+        env.update(self.cadence_vars)
+        return env
+
+    @property
+    def cadence_vars(self) -> Dict[str, str]:
+        """
+        Environment variables common to all Cadence tools, read from the settings once per tool run.
+        """
+        return self.run_cached("_cadence_vars", lambda: {
             "CDS_LIC_FILE": self.get_setting("cadence.CDS_LIC_FILE"),
             "CADENCE_HOME": self.get_setting("cadence.cadence_home")
-        }
+        })
 
-        return reduce(add_dicts, [dict(super().env_vars)] + list_of_vars + [cadence_vars], {})
+    def run_cached(self, key: str, build: Callable[[], T]) -> T:
+        """
+        Get a value that is fixed for the tool run, building it on first use.
+        The value is kept with the rest of the per-run state through attr_getter/attr_setter.
+
+        :param key: Attribute key to keep the value under
+        :param build: Function that builds the value
+        :return: The value
+        """
+        value = self.attr_getter(key, None)  # type: Optional[T]
+        if value is None:
+            value = build()
+            self.attr_setter(key, value)
+        return value
+
+    def create_enter_script(self, enter_script_location: str = "", raw: bool = False) -> None:
+        """
+        Create the enter script, but leave an existing one untouched if its contents would not change.
+        Keeping the old file avoids bumping its modification time, which would otherwise trigger
+        spurious rebuilds in make-based flows.
+        """
+        if enter_script_location == "":
+            enter_script_location = os.path.join(self.run_dir, "enter")
+        new_script_location = enter_script_location + ".new"
+        super().create_enter_script(new_script_location, raw)
+        if os.path.isfile(enter_script_location) and filecmp.cmp(new_script_location, enter_script_location, shallow=False):
+            os.remove(new_script_location)
+        else:
+            os.replace(new_script_location, enter_script_location)
+
+    def write_output_script(self, path: str) -> None:
+        """
+        Write the lines in self.output to the given script.
+        The lines are streamed out through a large buffer rather than joined into one string first, and written under
+        a temporary name that is renamed into place so that the script is never seen partially written.
+        :param path: Path of the script to write
+        """
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", buffering=1 << 20) as f:
+            f.writelines(line + "\n" for line in self.output)
+        os.replace(tmp_path, path)
 
     def version_number(self, version: str) -> int:
         """
         Assumes versions look like MAJOR_ISRMINOR and we will have less than 100 minor versions.
         """
-        main_version = int(version.split("_")[0]) # type: int
-        minor_version = 0 # type: int
-        if "_" in version:
-            minor_version = int(version.split("_")[1][3:])
+        parts = version.split("_", 1)
+        main_version = int(parts[0]) # type: int
+        minor_version = int(parts[1][3:]) if len(parts) > 1 else 0 # type: int
         return main_version * 100 + minor_version
 
     @property
@@ -67,23 +188,30 @@ class CadenceTool(HasSDCSupport, HasCPFSupport, HasUPFSupport, TCLTool, HammerTo
         match a given corner (voltage/temperature).
         :return: List of lib files separated by spaces
         """
-        
-        lib_pref = self.get_setting("vlsi.technology.timing_lib_pref")  # type: List[Dict[str, Any]]
+        cache = self.lib_args_cache("timing_libs")
+        key = optional_map(corner, lambda c: (c.voltage.value, c.temp.value))
+        if key not in cache:
+            lib_pref = self.get_setting("vlsi.technology.timing_lib_pref")  # type: List[Dict[str, Any]]
 
-        pre_filters = optional_map(corner, lambda c: [self.filter_for_mmmc(voltage=c.voltage,
-                                                                           temp=c.temp)])  # type: Optional[List[Callable[[hammer_tech.Library],bool]]]
+            pre_filters = optional_map(corner, lambda c: [self.filter_for_mmmc(voltage=c.voltage,
+                                                                               temp=c.temp)])  # type: Optional[List[Callable[[hammer_tech.Library],bool]]]
 
-        lib_args = self.technology.read_libs([hammer_tech.filters.get_timing_lib_with_preference(lib_pref)],
-                                             hammer_tech.HammerTechnologyUtils.to_plain_item,
-                                             extra_pre_filters=pre_filters)
-        return " ".join(lib_args)
+            lib_args = self.technology.read_libs([hammer_tech.filters.get_timing_lib_with_preference(lib_pref)],
+                                                 hammer_tech.HammerTechnologyUtils.to_plain_item,
+                                                 extra_pre_filters=pre_filters)
+            cache[key] = " ".join(lib_args)
+        return cache[key]
 
     def get_mmmc_qrc(self, corner: MMMCCorner) -> str:
-        lib_args = self.technology.read_libs([hammer_tech.filters.qrc_tech_filter],
-                                             hammer_tech.HammerTechnologyUtils.to_plain_item,
-                                             extra_pre_filters=[
-                                                 self.filter_for_mmmc(voltage=corner.voltage, temp=corner.temp)])
-        return " ".join(lib_args)
+        cache = self.lib_args_cache("mmmc_qrc")
+        key = (corner.voltage.value, corner.temp.value)
+        if key not in cache:
+            lib_args = self.technology.read_libs([hammer_tech.filters.qrc_tech_filter],
+                                                 hammer_tech.HammerTechnologyUtils.to_plain_item,
+                                                 extra_pre_filters=[
+                                                     self.filter_for_mmmc(voltage=corner.voltage, temp=corner.temp)])
+            cache[key] = " ".join(lib_args)
+        return cache[key]
 
     def get_qrc_tech(self) -> str:
         """
@@ -91,10 +219,23 @@ class CadenceTool(HasSDCSupport, HasCPFSupport, HasUPFSupport, TCLTool, HammerTo
 
         :return: List of qrc tech files separated by spaces
         """
-        lib_args = self.technology.read_libs([
-            hammer_tech.filters.qrc_tech_filter
-        ], hammer_tech.HammerTechnologyUtils.to_plain_item)
-        return " ".join(lib_args)
+        cache = self.lib_args_cache("qrc_tech")
+        if None not in cache:
+            lib_args = self.technology.read_libs([
+                hammer_tech.filters.qrc_tech_filter
+            ], hammer_tech.HammerTechnologyUtils.to_plain_item)
+            cache[None] = " ".join(lib_args)
+        return cache[None]
+
+    def lib_args_cache(self, name: str) -> Dict[Any, str]:
+        """
+        Per-run cache for the library lookups above, which only depend on the corner's voltage and temperature
+        and are otherwise repeated for every MMMC corner and every generated script.
+
+        :param name: Name of the lookup being cached
+        :return: Dictionary from lookup key to the space separated list of files
+        """
+        return self.run_cached("_{}_cache".format(name), dict)
 
     def generate_sdc_files(self) -> List[str]:
         """
@@ -141,10 +282,12 @@ class CadenceTool(HasSDCSupport, HasCPFSupport, HasUPFSupport, TCLTool, HammerTo
             sdc_files_arg = "-sdc_files [list {sdc_files}]".format(
                 sdc_files=" ".join(sdc_files)
             )
+            input_files = list(sdc_files)
         else:
             blank_sdc = os.path.join(self.run_dir, "blank.sdc")
-            self.run_executable(["touch", blank_sdc])
+            self.write_contents_to_path("", blank_sdc)
             sdc_files_arg = "-sdc_files {{ {} }}".format(blank_sdc)
+            input_files = [blank_sdc]
         append_mmmc("create_constraint_mode -name {name} {sdc_files_arg}".format(
             name=constraint_mode,
             sdc_files_arg=sdc_files_arg
@@ -170,32 +313,20 @@ class CadenceTool(HasSDCSupport, HasCPFSupport, HasUPFSupport, TCLTool, HammerTo
                 else:
                     raise ValueError("Unsupported MMMCCornerType")
 
-                # First, create Innovus library sets
-                append_mmmc("create_library_set -name {name}_set -timing [list {list}]".format(
-                    name=corner_name,
-                    list=self.get_timing_libs(corner)
-                ))
-                # Skip opconds for now
-                # Next, create Innovus timing conditions
-                append_mmmc("create_timing_condition -name {name}_cond -library_sets [list {name}_set]".format(
-                    name=corner_name
-                ))
-                # Next, create Innovus rc corners from qrc tech files
-                append_mmmc("create_rc_corner -name {name}_rc -temperature {tempInCelsius} {qrc}".format(
+                # Create the Innovus library set, timing condition, rc corner, delay corner and analysis view.
+                # Opconds are skipped for now.
+                qrc = self.get_mmmc_qrc(corner)
+                libs = self.get_timing_libs(corner)
+                input_files.extend(libs.split())
+                input_files.extend(qrc.split())
+                for cmd in _MMMC_CORNER_TEMPLATE.format(
                     name=corner_name,
+                    libs=libs,
                     tempInCelsius=str(corner.temp.value),
-                    qrc="-qrc_tech {}".format(self.get_mmmc_qrc(corner)) if self.get_mmmc_qrc(corner) != '' else ''
-                ))
-                # Next, create an Innovus delay corner.
-                append_mmmc(
-                    "create_delay_corner -name {name}_delay -timing_condition {name}_cond -rc_corner {name}_rc".format(
-                        name=corner_name
-                ))
-                # Next, create the analysis views
-                append_mmmc("create_analysis_view -name {name}_view -delay_corner {name}_delay -constraint_mode {constraint}".format(
-                    name=corner_name,
+                    qrc="-qrc_tech {}".format(qrc) if qrc != '' else '',
                     constraint=constraint_mode
-                ))
+                ).split("\n"):
+                    append_mmmc(cmd)
 
             # Finally, apply the analysis view.
             # TODO: should not need to analyze extra views as well. Defaulting to hold for now (min. runtime impact).
@@ -207,9 +338,11 @@ class CadenceTool(HasSDCSupport, HasCPFSupport, HasUPFSupport, TCLTool, HammerTo
         else:
             # First, create an Innovus library set.
             library_set_name = "my_lib_set"
+            libs = self.get_timing_libs()
+            input_files.extend(libs.split())
             append_mmmc("create_library_set -name {name} -timing [list {list}]".format(
                 name=library_set_name,
-                list=self.get_timing_libs()
+                list=libs
             ))
             # Next, create an Innovus timing condition.
             timing_condition_name = "my_timing_condition"
@@ -219,9 +352,11 @@ class CadenceTool(HasSDCSupport, HasCPFSupport, HasUPFSupport, TCLTool, HammerTo
             ))
             # extra junk: -opcond ...
             rc_corner_name = "rc_cond"
+            qrc = self.get_qrc_tech()
+            input_files.extend(qrc.split())
             append_mmmc("create_rc_corner -name {name} {qrc}".format(
                 name=rc_corner_name,
-                qrc="-qrc_tech {}".format(self.get_qrc_tech()) if self.get_qrc_tech() != '' else ''
+                qrc="-qrc_tech {}".format(qrc) if qrc != '' else ''
             ))
             # Next, create an Innovus delay corner.
             delay_corner_name = "my_delay_corner"
@@ -243,8 +378,18 @@ class CadenceTool(HasSDCSupport, HasCPFSupport, HasUPFSupport, TCLTool, HammerTo
                 hold_view=analysis_view_name
             ))
 
+        # Corners often share libraries, so keep each file once.
+        self.attr_setter("_mmmc_input_files", list(dict.fromkeys(input_files)))
         return "\n".join(mmmc_output)
 
+    @property
+    def mmmc_input_files(self) -> List[str]:
+        """
+        Files read by the last script from generate_mmmc_script: the SDC files, timing libraries and QRC tech files.
+        Empty if no mmmc script was generated in this run.
+        """
+        return self.attr_getter("_mmmc_input_files", [])
+
     def generate_dont_use_commands(self) -> List[str]:
         """
         Generate a list of dont_use commands for Cadence tools.
@@ -260,17 +405,11 @@ class CadenceTool(HasSDCSupport, HasCPFSupport, HasUPFSupport, TCLTool, HammerTo
             # Check for cell existence first to avoid Genus erroring out.
             get_db_str = "[get_db lib_cells {mapped_cell}]".format(mapped_cell=mapped_cell)
             # Escaped version for puts.
-            get_db_str_escaped = get_db_str.replace('[', '\[').replace(']', '\]')
-            return """
-puts "set_dont_use {get_db_str_escaped}"
-if {{ {get_db_str} ne "" }} {{
-    set_dont_use {get_db_str}
-}} else {{
-    puts "WARNING: cell {mapped_cell} was not found for set_dont_use"
-}}
-            """.format(get_db_str=get_db_str, get_db_str_escaped=get_db_str_escaped, mapped_cell=mapped_cell)
+            get_db_str_escaped = get_db_str.translate(_TCL_BRACKET_ESCAPES)
+            return _DONT_USE_TEMPLATE.format(get_db_str=get_db_str, get_db_str_escaped=get_db_str_escaped, mapped_cell=mapped_cell)
 
-        return list(map(map_cell, self.get_dont_use_list()))
+        # Libraries can share cell names, so drop repeats while keeping the original order.
+        return [map_cell(cell) for cell in dict.fromkeys(self.get_dont_use_list())]
 
     def map_power_spec_name(self) -> str:
         """
@@ -374,67 +513,39 @@ if {{ {get_db_str} ne "" }} {{
             '''.format(CELLS=" ".join(child_modules))
 
     def write_regs_tcl(self) -> str:
-        return '''
-        set write_cells_ir "./find_regs_cells.json"
-        set write_cells_ir [open $write_cells_ir "w"]
-        puts $write_cells_ir "\["
-
-        set refs [get_db [get_db lib_cells -if .is_sequential==true] .base_name]
-
-        set len [llength $refs]
-
-        for {set i 0} {$i < [llength $refs]} {incr i} {
-            if {$i == $len - 1} {
-                puts $write_cells_ir "    \\"[lindex $refs $i]\\""
-            } else {
-                puts $write_cells_ir "    \\"[lindex $refs $i]\\","
-            }
-        }
-
-        puts $write_cells_ir "\]"
-        close $write_cells_ir
-        set write_regs_ir "./find_regs_paths.json"
-        set write_regs_ir [open $write_regs_ir "w"]
-        puts $write_regs_ir "\["
-
-        set regs [get_db [get_db [all_registers -edge_triggered -output_pins] -if .direction==out] .name]
-
-        set len [llength $regs]
-
-        for {set i 0} {$i < [llength $regs]} {incr i} {
-            #regsub -all {/} [lindex $regs $i] . myreg
-            set myreg [lindex $regs $i]
-            if {$i == $len - 1} {
-                puts $write_regs_ir "    \\"$myreg\\""
-            } else {
-                puts $write_regs_ir "    \\"$myreg\\","
-            }
-        }
-
-        puts $write_regs_ir "\]"
-
-        close $write_regs_ir
-        '''
+        return _WRITE_REGS_TCL
 
     def process_reg_paths(self, path: str) -> bool:
         # Post-process the all_regs list here to avoid having too much logic in TCL
-        with open(path, "r+") as f:
-            reg_paths = json.load(f)
-            output_paths = [] #  type: List[Dict[str,str]]
-            assert isinstance(reg_paths, List), "Output find_regs_paths.json should be a json list of strings"
-            for i in range(len(reg_paths)):
-                split = reg_paths[i].split("/")
-                # If the net is part of a generate block, the generated names have a "." in them and the whole name
-                # needs to be escaped.
-                for index, node in enumerate(split):
-                    if "." in node:
-                        split[index] = "\\" + node + "\\"
-                # If the last net is part of a bus, it needs to be escaped
-                if split[-2][-1] == "]":
-                    split[-2] = "\\" + split[-2]
-                    reg_paths[i] = {"path" : '/'.join(split[0:len(split)-1]), "pin" : split[-1]}
-                else:
-                    reg_paths[i] = {"path" : '/'.join(split[0:len(split)-1]), "pin" : split[-1]}
+        # write_regs_tcl writes the raw paths one per line next to the JSON output, which is much cheaper
+        # to read back than JSON; a JSON list of strings from an older run is still accepted.
+        raw_path = os.path.splitext(path)[0] + ".txt"
+        if os.path.isfile(raw_path):
+            src_path = raw_path
+        elif os.path.isfile(path):
+            src_path = path
+        else:
+            self.logger.error("Register paths {} not found".format(raw_path))
+            return False
+
+        # Stream the entries into a temporary file and move it into place once complete.
+        tmp_path = path + ".tmp"
+        with open(src_path, "r") as f, open(tmp_path, "w") as out:
+            if src_path == raw_path:
+                reg_paths = (line.rstrip("\n") for line in f)  # type: Iterable[str]
+            else:
+                reg_paths = json.load(f)
+                assert isinstance(reg_paths, list), "Output find_regs_paths.json should be a json list of strings"
+
+            # Bind the per-entry callables once; this loop runs for every register in the design.
+            # json.dumps with default arguments reuses a shared encoder, which is faster than passing separators.
+            write = out.write
+            dumps = json.dumps
+            delim = "\n  "
+            write("[")
+            for reg in map(_reg_path_to_dict, reg_paths):
+                write(delim + dumps(reg))
+                delim = ",\n  "
 
             # For parent hierarchical modules, append all child instance regs
             if self.hierarchical_mode.is_nonleaf_hierarchical():
@@ -445,11 +556,9 @@ if {{ {get_db_str} ne "" }} {{
                     with open(os.path.join(os.path.dirname(ilm.dir), "find_regs_paths.json"), "r") as crf:
                         child_regs = json.load(crf)
                     for inst_path in mod_path[1]:
-                        prefixed_regs = copy.deepcopy(child_regs)
-                        for reg in prefixed_regs:
-                            reg.update({'path': os.path.join(inst_path, reg['path'])})
-                        reg_paths.extend(prefixed_regs)
-
-            f.seek(0) # Move to beginning to rewrite file
-            json.dump(reg_paths, f, indent=2) # Elide the truncation because we are always increasing file size
+                        for reg in child_regs:
+                            write(delim + dumps(dict(reg, path=os.path.join(inst_path, reg['path']))))
+                            delim = ",\n  "
+            write("\n]\n")
+        os.replace(tmp_path, path)
         return True
@@ -250,7 +250,7 @@ class Conformal(HammerFormalTool, CadenceTool):
 
         # Write main dofile
         dofile = os.path.join(self.run_dir, f"{self.check}.tcl")
-        self.write_contents_to_path("\n".join(self.output), dofile)
+        self.write_output_script(dofile)
 
         # Build args
         args = self.start_cmd
@@ -69,11 +69,11 @@ class Innovus(HammerPlaceAndRouteTool, CadenceTool):
             if not os.path.isfile(self.all_cells_path):
                 raise ValueError("Output find_regs_cells.json %s not found" % (self.all_cells_path))
 
-            if not os.path.isfile(self.all_regs_path):
-                raise ValueError("Output find_regs_paths.json %s not found" % (self.all_regs_path))
-
             if not self.process_reg_paths(self.all_regs_path):
                 self.logger.error("Failed to process all register paths")
+
+            if not os.path.isfile(self.all_regs_path):
+                raise ValueError("Output find_regs_paths.json %s not found" % (self.all_regs_path))
         else:
             self.logger.info("Did not run write_regs")
 
@@ -814,7 +814,7 @@ class Innovus(HammerPlaceAndRouteTool, CadenceTool):
 
         # Create par script.
         par_tcl_filename = os.path.join(self.run_dir, "par.tcl")
-        self.write_contents_to_path("\n".join(self.output), par_tcl_filename)
+        self.write_output_script(par_tcl_filename)
 
         # Make sure that generated-scripts exists.
         os.makedirs(self.generated_scripts_dir, exist_ok=True)
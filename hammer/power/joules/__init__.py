@@ -241,7 +241,7 @@ class Joules(HammerPowerTool, CadenceTool):
 
         # Create power analysis script
         joules_tcl_filename = os.path.join(self.run_dir, "joules.tcl")
-        self.write_contents_to_path("\n".join(self.output), joules_tcl_filename)
+        self.write_output_script(joules_tcl_filename)
 
         # Build args
         args = [
@@ -726,7 +726,7 @@ class Voltus(HammerPowerTool, CadenceTool):
 
         # Create power analysis script
         power_tcl_filename = os.path.join(self.run_dir, "power.tcl")
-        self.write_contents_to_path("\n".join(self.output), power_tcl_filename)
+        self.write_output_script(power_tcl_filename)
 
         # Build args
         base_args = [
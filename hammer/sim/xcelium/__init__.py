@@ -15,13 +15,9 @@
 #        3) Direct invocation of xmvlog, xmelab, xmsim tools manually.
 
 import os
-import re
-import shutil
 import json
-import datetime
 import io
-import sys
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import hammer.utils
 import hammer.tech as hammer_tech
@@ -31,6 +27,9 @@ from hammer.vlsi import HammerSimTool, HammerToolStep, HammerLSFSubmitCommand, H
 from hammer.logging import HammerVLSILogging
 from hammer.cadence.tool import CadenceTool
 
+# Characters which require a register subpath to be escaped in deposit commands.
+_SPECIAL_CHARS = frozenset("[]#$;!{}\\")
+
 class xcelium(HammerSimTool, CadenceTool):
 
   @property
@@ -62,7 +61,15 @@ class xcelium(HammerSimTool, CadenceTool):
   
   @property
   def xcelium_bin(self) -> str:
-    return self.get_setting("sim.xcelium.xcelium_bin")
+    return self.cached_setting("sim.xcelium.xcelium_bin")
+
+  # Settings are fixed for the duration of a tool run, so memoize lookups that are repeated across steps.
+  # List-valued settings must be copied by the caller before being modified.
+  def cached_setting(self, key: str, nullvalue: Any = None) -> Any:
+    cache = self.run_cached("_setting_cache", dict)  # type: Dict[str, Any]
+    if key not in cache:
+      cache[key] = self.get_setting(key, nullvalue)
+    return cache[key]
 
   @property
   def sim_tcl_file(self) -> str: 
@@ -88,9 +95,9 @@ class xcelium(HammerSimTool, CadenceTool):
     self.output_waveforms = []
     self.output_saifs = []
     self.output_top_module = self.top_module
-    self.output_tb_name = self.get_setting(f"{self.sim_input_prefix}.tb_name")
-    self.output_tb_dut  = self.get_setting(f"{self.sim_input_prefix}.tb_dut")
-    self.output_level   = self.get_setting(f"{self.sim_input_prefix}.level")
+    self.output_tb_name = self.cached_setting(f"{self.sim_input_prefix}.tb_name")
+    self.output_tb_dut  = self.cached_setting(f"{self.sim_input_prefix}.tb_dut")
+    self.output_level   = self.cached_setting(f"{self.sim_input_prefix}.level")
     
     if saif_opts ["mode"] is not None:
       self.output_saifs.append(os.path.join(self.run_dir, "ucli.saif"))
@@ -102,8 +109,23 @@ class xcelium(HammerSimTool, CadenceTool):
   
   # Several extract functions are used to process mandatory keys into string options. 
   # Returns a raw input dictionary as well.
+  # Settings do not change over a tool run, so each extraction is evaluated once and cached.
+  # Copies are handed out because callers pop entries from the processed dictionary.
+
+  def cached_opts(self, key: str, extract: Callable[[], Tuple[Dict[str, str], Dict[str, str]]]) -> Tuple[Dict[str, str], Dict[str, str]]:
+    opts = self.run_cached(key, extract)
+    return opts[0].copy(), opts[1].copy()
 
   def extract_xrun_opts(self) -> Tuple[Dict[str, str], Dict[str, str]]:
+    return self.cached_opts("_xrun_opts", self._extract_xrun_opts)
+
+  def extract_sim_opts(self) -> Tuple[Dict[str, str], Dict[str, str]]:
+    return self.cached_opts("_sim_opts", self._extract_sim_opts)
+
+  def extract_waveform_opts(self) -> Tuple[Dict[str, str], Dict[str, str]]:
+    return self.cached_opts("_wav_opts", self._extract_waveform_opts)
+
+  def _extract_xrun_opts(self) -> Tuple[Dict[str, str], Dict[str, str]]:
     xrun_opts_def = {"enhanced_recompile": True,
                      "xmlibdirname": None,
                      "xmlibdirpath": None,
@@ -137,8 +159,9 @@ class xcelium(HammerSimTool, CadenceTool):
     
     return xrun_opts_proc, xrun_opts 
   
-  def extract_sim_opts(self) -> Tuple[Dict[str, str], Dict[str, str]]:
-    abspath_input_files = list(map(lambda name: os.path.join(os.getcwd(), name), self.input_files))
+  def _extract_sim_opts(self) -> Tuple[Dict[str, str], Dict[str, str]]:
+    cwd = os.getcwd()
+    abspath_input_files = [os.path.join(cwd, name) for name in self.input_files]
     sim_opts_def = {"tb_name": None,
                     "tb_dut": None,
                     "timescale": None,
@@ -153,21 +176,21 @@ class xcelium(HammerSimTool, CadenceTool):
     sim_opts = self.get_settings_from_dict(sim_opts_def, self.sim_input_prefix, optional_keys)
     # Additional keys required if GL.
     if self.level.is_gatelevel(): 
-      sim_opts ["gl_register_force_value"] = self.get_setting(f"{self.sim_input_prefix}.gl_register_force_value", 0)
-      sim_opts ["timing_annotated"] = self.get_setting(f"{self.sim_input_prefix}.timing_annotated", False)
+      sim_opts ["gl_register_force_value"] = self.cached_setting(f"{self.sim_input_prefix}.gl_register_force_value", 0)
+      sim_opts ["timing_annotated"] = self.cached_setting(f"{self.sim_input_prefix}.timing_annotated", False)
 
     sim_opts_proc = sim_opts.copy()
-    sim_opts_proc ["input_files"] =  "\n".join([input for input in abspath_input_files])
+    sim_opts_proc ["input_files"] =  "\n".join(abspath_input_files)
     sim_opts_proc ["tb_name"]   = "-top " + sim_opts_proc ["tb_name"]
     sim_opts_proc ["timescale"] = "-timescale " + sim_opts_proc ["timescale"]
-    if sim_opts_proc ["defines"] is not None: sim_opts_proc ["defines"] = "\n".join(["-define " + define for define in sim_opts_proc ["defines"]]) 
-    if sim_opts_proc ["incdir"] is not None:  sim_opts_proc ["incdir"]  = "\n".join(["-incdir " + incdir for incdir in sim_opts_proc ["incdir"]]) 
-    if sim_opts_proc ["compiler_cc_opts"] is not None: sim_opts_proc ["compiler_cc_opts"] = "\n".join(["-Wcxx," + opt for opt in sim_opts_proc ["compiler_cc_opts"]]) 
-    if sim_opts_proc ["compiler_ld_opts"] is not None: sim_opts_proc ["compiler_ld_opts"] = "\n".join(["-Wld," + opt for opt in sim_opts_proc ["compiler_ld_opts"]]) 
+    if sim_opts_proc ["defines"] is not None: sim_opts_proc ["defines"] = "\n".join(f"-define {define}" for define in sim_opts_proc ["defines"]) 
+    if sim_opts_proc ["incdir"] is not None:  sim_opts_proc ["incdir"]  = "\n".join(f"-incdir {incdir}" for incdir in sim_opts_proc ["incdir"]) 
+    if sim_opts_proc ["compiler_cc_opts"] is not None: sim_opts_proc ["compiler_cc_opts"] = "\n".join(f"-Wcxx,{opt}" for opt in sim_opts_proc ["compiler_cc_opts"]) 
+    if sim_opts_proc ["compiler_ld_opts"] is not None: sim_opts_proc ["compiler_ld_opts"] = "\n".join(f"-Wld,{opt}" for opt in sim_opts_proc ["compiler_ld_opts"]) 
 
     return sim_opts_proc, sim_opts
 
-  def extract_waveform_opts(self) -> Tuple[Dict[str, str], Dict[str, str]]:
+  def _extract_waveform_opts(self) -> Tuple[Dict[str, str], Dict[str, str]]:
     wav_opts_def = {"type": None,
                     "dump_name": "waveform",
                     "compression": False,
@@ -177,13 +200,13 @@ class xcelium(HammerSimTool, CadenceTool):
     
     # Because key-driven waveform spec is optional, should return none-type dict by default.
     wav_opts = {}
-    if self.get_setting(f"{self.sim_waveform_prefix}.type") is not None:
+    if self.cached_setting(f"{self.sim_waveform_prefix}.type") is not None:
       optional_keys = ["shm_incr"]
       wav_opts = self.get_settings_from_dict(wav_opts_def, self.sim_waveform_prefix, optional_keys)
       wav_opts_proc = wav_opts.copy()
       wav_opts_proc ["compression"] = "-compress" if wav_opts ["compression"] else ""
-      if wav_opts_proc ["probe_paths"] is not None: wav_opts_proc ["probe_paths"] = "\n".join(["probe -create " + path for path in wav_opts_proc ["probe_paths"]]) 
-      if wav_opts_proc ["tcl_opts"] is not None:    wav_opts_proc ["tcl_opts"]    = "\n".join(opt for opt in wav_opts_proc ["tcl_opts"]) 
+      if wav_opts_proc ["probe_paths"] is not None: wav_opts_proc ["probe_paths"] = "\n".join(f"probe -create {path}" for path in wav_opts_proc ["probe_paths"]) 
+      if wav_opts_proc ["tcl_opts"] is not None:    wav_opts_proc ["tcl_opts"]    = "\n".join(wav_opts_proc ["tcl_opts"]) 
     else: 
       wav_opts = {"type": None}
       wav_opts_proc = wav_opts.copy()
@@ -193,19 +216,20 @@ class xcelium(HammerSimTool, CadenceTool):
   def extract_saif_opts(self) -> Dict[str, str]:
 
     saif_opts = {}
-    saif_opts ["mode"] = self.get_setting(f"{self.sim_input_prefix}.saif.mode")
+    saif_opts ["mode"] = self.cached_setting(f"{self.sim_input_prefix}.saif.mode")
 
     if saif_opts ["mode"] == "time":
-      saif_opts ["start_time"] = self.get_setting(f"{self.sim_input_prefix}.saif.start_time")
-      saif_opts ["end_time"]   = self.get_setting(f"{self.sim_input_prefix}.saif.end_time")
+      saif_opts ["start_time"] = self.cached_setting(f"{self.sim_input_prefix}.saif.start_time")
+      saif_opts ["end_time"]   = self.cached_setting(f"{self.sim_input_prefix}.saif.end_time")
     if saif_opts ["mode"] == "trigger_raw":
-      saif_opts ["start_trigger_raw"] = self.get_setting(f"{self.sim_input_prefix}.saif.start_trigger_raw")
-      saif_opts ["end_trigger_raw"]   = self.get_setting(f"{self.sim_input_prefix}.saif.end_trigger_raw")
+      saif_opts ["start_trigger_raw"] = self.cached_setting(f"{self.sim_input_prefix}.saif.start_trigger_raw")
+      saif_opts ["end_trigger_raw"]   = self.cached_setting(f"{self.sim_input_prefix}.saif.end_trigger_raw")
     return saif_opts
 
   # Label generated files
   def write_header(self, header: str, wrapper: io.TextIOWrapper)->None:
-    now = datetime.datetime.now()
+    from datetime import datetime
+    now = datetime.now()
     wrapper.write("# "+"="*39+"\n")
     wrapper.write("# "+header+"\n")
     wrapper.write(f"# CREATED AT {now} \n")
@@ -230,64 +254,80 @@ class xcelium(HammerSimTool, CadenceTool):
                         header: str, 
                         additional_opt: List[Tuple[str, List[str]]] = [],
                         sim_opt_removal: List[str]=[],
-                        xrun_opt_removal: List[str]=[]) -> str:
+                        xrun_opt_removal: List[str]=[],
+                        xrun_opts_proc: Optional[Dict[str, str]] = None,
+                        sim_opts_proc: Optional[Dict[str, str]] = None) -> str:
 
     # Xrun opts and sim opts must generally be carried through for 1:1:1 correspondence between calls.
     # However, certain opts must be removed (e.g., during sim step), leading to the inclusion of removal opts.
-    xrun_opts_proc = self.extract_xrun_opts()[0]
-    sim_opts_proc  = self.extract_sim_opts()[0]
-    sim_opt_removal.extend(["tb_dut", "execute_sim", "gl_register_force_value", "timing_annotated"]) # Always remove these.
-    [xrun_opts_proc.pop(opt, None) for opt in xrun_opt_removal]
-    [sim_opts_proc.pop(opt, None) for opt in sim_opt_removal]
+    # Callers that already extracted the options may pass them in; they are modified in place.
+    if xrun_opts_proc is None: xrun_opts_proc = self.extract_xrun_opts()[0]
+    if sim_opts_proc is None:  sim_opts_proc  = self.extract_sim_opts()[0]
+    for opt in xrun_opt_removal:
+      xrun_opts_proc.pop(opt, None)
+    for opt in sim_opt_removal + ["tb_dut", "execute_sim", "gl_register_force_value", "timing_annotated"]: # Always remove these.
+      sim_opts_proc.pop(opt, None)
     
-    arg_path  = self.run_dir+f"/{file_name}"
-    f = open(arg_path,"w+")
-    self.write_header(header, f)    
-    
-    f.write("\n# XRUN OPTIONS: \n")
-    [f.write(elem + "\n") for elem in xrun_opts_proc.values() if elem is not None]
-    f.write("\n# SIM OPTIONS: \n")
-    [f.write(elem + "\n") for elem in sim_opts_proc.values() if elem is not None]
-    for opt_list in additional_opt: 
-      if opt_list[1]: 
-        f.write(f"\n# {opt_list[0]} OPTIONS: \n")
-        [f.write(elem + "\n") for elem in opt_list[1]]
-    f.close()  
+    arg_path  = os.path.join(self.run_dir, file_name)
+    # "w" truncates any stale arg file in place; no need to remove it first.
+    with open(arg_path, "w") as f:
+      self.write_header(header, f)
+
+      # Accumulate the options and issue a single write rather than one per option.
+      lines = ["", "# XRUN OPTIONS: "]
+      lines.extend(elem for elem in xrun_opts_proc.values() if elem is not None)
+      lines.extend(["", "# SIM OPTIONS: "])
+      lines.extend(elem for elem in sim_opts_proc.values() if elem is not None)
+      for opt_list in additional_opt:
+        if opt_list[1]:
+          lines.extend(["", f"# {opt_list[0]} OPTIONS: "])
+          lines.extend(opt_list[1])
+      f.write("\n".join(lines) + "\n")
     
     return arg_path  
   
   # Convenience function invoked when multicore options are needed.
   def generate_mc_cmd(self) -> str:
     opts = ""
-    num_threads=int(self.get_setting("vlsi.core.max_threads")) - 1
+    num_threads=int(self.cached_setting("vlsi.core.max_threads")) - 1
     opts = opts + f"-mce_build_thread_count {num_threads} \n"
     opts = opts + f"-mce_sim_thread_count {num_threads} \n"
     return opts
   
   # Deposit values
   # Try to maintain some parity with vcs plugin.
-  def generate_gl_deposit_tcl(self) -> List[str]:
-    sim_opts  = self.extract_sim_opts() [1]
+  def generate_gl_deposit_tcl(self, sim_opts: Optional[Dict[str, str]] = None) -> List[str]:
+    if sim_opts is None: sim_opts = self.extract_sim_opts()[1]
     tb_prefix = sim_opts["tb_name"] + '.' + sim_opts["tb_dut"]
     force_val = sim_opts["gl_register_force_value"]
     
     abspath_all_regs = os.path.join(os.getcwd(), self.all_regs)
-    if not os.path.isfile(abspath_all_regs):
-      self.logger.error("List of all regs json not found as expected at {0}".format(self.all_regs))
+    try:
+      with open(abspath_all_regs) as reg_file:
+        reg_json = json.load(reg_file)
+    except FileNotFoundError:
+      self.logger.error("List of all regs json not found as expected at {0}".format(abspath_all_regs))
+      return []
+    assert isinstance(reg_json, List), "list of all sequential cells should be a json list of dictionaries from string to string not {}".format(type(reg_json))
+
+    # Only the register path and pin vary per deposit.
+    deposit_prefix = f"deposit {tb_prefix}."
+    deposit_suffix = f" = {force_val}"
 
     formatted_deposit = []
-    with open(abspath_all_regs) as reg_file:
-      reg_json = json.load(reg_file)
-      assert isinstance(reg_json, List), "list of all sequential cells should be a json list of dictionaries from string to string not {}".format(type(reg_json))
-      for reg in sorted(reg_json, key=lambda r: len(r["path"])): 
-        path = reg["path"]
+    # Sort in place; the parsed register list can be large, so avoid a sorted() copy.
+    reg_json.sort(key=lambda r: len(r["path"]))
+    for reg in reg_json:
+      path = reg["path"]
+      if _SPECIAL_CHARS.isdisjoint(path):
+        # Common case: nothing to escape.
+        path = path.replace('/', '.')
+      else:
         path = path.split('/')
-        special_char =['[',']','#','$',';','!',"{",'}','\\']
-        path = ['@{' + subpath + ' }' if any(char in subpath for char in special_char) else subpath for subpath in path]
+        path = ['@{' + subpath + ' }' if not _SPECIAL_CHARS.isdisjoint(subpath) else subpath for subpath in path]
         path='.'.join(path)
-        pin = reg["pin"]
-        formatted_deposit.append("deposit " + tb_prefix + "." + path + "." + pin + " = " + str(force_val))
-        
+      formatted_deposit.append(f"{deposit_prefix}{path}.{reg['pin']}{deposit_suffix}")
+
     return formatted_deposit
 
   # Creates an sdf cmd file for command line driven sdf annotation.
@@ -296,18 +336,17 @@ class xcelium(HammerSimTool, CadenceTool):
     sim_opts  = self.extract_sim_opts()[1]
     prefix = sim_opts["tb_name"] + '.' + sim_opts["tb_dut"]
 
-    f = open(self.sdf_cmd_file,"w+")
-    f.write(f'SDF_FILE = "{self.sdf_file}", \n')
-    f.write(f'MTM_CONTROL = "MAXIMUM", \n')
-    f.write(f'SCALE_TYPE = "FROM_MAXIMUM", \n')
-    f.write(f'SCOPE = {prefix};')
-    f.close()
+    with open(self.sdf_cmd_file, "w") as f:
+      f.write(f'SDF_FILE = "{self.sdf_file}", \n')
+      f.write(f'MTM_CONTROL = "MAXIMUM", \n')
+      f.write(f'SCALE_TYPE = "FROM_MAXIMUM", \n')
+      f.write(f'SCOPE = {prefix};')
     return True
 
   # Creates saif arguments for tcl commands for tcl driver.
-  def generate_saif_tcl_cmd(self) -> str:
+  def generate_saif_tcl_cmd(self, sim_opts: Optional[Dict[str, str]] = None) -> str:
     saif_opts = self.extract_saif_opts()
-    sim_opts  = self.extract_sim_opts()[1]
+    if sim_opts is None: sim_opts = self.extract_sim_opts()[1]
     prefix = sim_opts["tb_name"] + '.' + sim_opts["tb_dut"]
 
     saif_args = ""
@@ -339,41 +378,45 @@ class xcelium(HammerSimTool, CadenceTool):
     return saif_args
 
   # Creates a tcl driver for simulation.
-  def generate_sim_tcl(self) -> bool:
-    xmsimrc_def = self.get_setting("sim.xcelium.xmsimrc_def")
+  def generate_sim_tcl(self,
+                       sim_opts: Optional[Dict[str, str]] = None,
+                       wav_opts_proc: Optional[Dict[str, str]] = None,
+                       wav_opts: Optional[Dict[str, str]] = None) -> bool:
+    xmsimrc_def = self.cached_setting("sim.xcelium.xmsimrc_def")
     saif_opts   = self.extract_saif_opts()
-    wav_opts_proc, wav_opts = self.extract_waveform_opts()
-
-    f = open(self.sim_tcl_file,"w+")
-    self.write_header("HAMMER-GEN SIM TCL DRIVER", f)    
-    f.write(f"source {xmsimrc_def} \n")
-    
-    # Prepare waveform dump options if specified.
-    if wav_opts["type"] is not None:
-      if wav_opts["type"]   == "VCD":  f.write(f'database -open -vcd vcddb -into {wav_opts["dump_name"]}.vcd -default {wav_opts_proc["compression"]} \n')
-      elif wav_opts["type"] == "EVCD": f.write(f'database -open -evcd evcddb -into {wav_opts["dump_name"]}.evcd -default {wav_opts_proc["compression"]} \n')
-      elif wav_opts["type"] == "SHM":  f.write(f'database -open -shm shmdb -into {wav_opts["dump_name"]}.shm -event -default {wav_opts_proc["compression"]} {wav_opts_proc["shm_incr"]} \n')
-      if wav_opts_proc["probe_paths"] is not None: 
-        [f.write(f'{wav_opts_proc["probe_paths"]}\n')]
-      if wav_opts_proc["tcl_opts"] is not None: [f.write(f'{wav_opts_proc["tcl_opts"]}\n')]
-    
-    # Deposit gl values.
-    if self.level.is_gatelevel(): 
-      formatted_deposit = self.generate_gl_deposit_tcl()
-      [f.write(f'{deposit}\n') for deposit in formatted_deposit]
-
-    # Create saif file if specified.
-    if saif_opts["mode"] is not None:
-      f.write(f'{self.generate_saif_tcl_cmd()}\n')
-    
-    # Execute
-    f.write("run \n")
-    
-    # Close databases and dumps properly.
-    f.write("dumpsaif -end \n")
-    f.write("database -close *db \n")
-    f.write("exit")
-    f.close()  
+    if sim_opts is None: sim_opts = self.extract_sim_opts()[1]
+    if wav_opts_proc is None or wav_opts is None: wav_opts_proc, wav_opts = self.extract_waveform_opts()
+
+    # Gather the gl deposits before opening the driver so a bad register list doesn't leave a partial file.
+    formatted_deposit = self.generate_gl_deposit_tcl(sim_opts) if self.level.is_gatelevel() else []
+
+    with open(self.sim_tcl_file, "w") as f:
+      self.write_header("HAMMER-GEN SIM TCL DRIVER", f)
+      f.write(f"source {xmsimrc_def} \n")
+
+      # Prepare waveform dump options if specified.
+      if wav_opts["type"] is not None:
+        if wav_opts["type"]   == "VCD":  f.write(f'database -open -vcd vcddb -into {wav_opts["dump_name"]}.vcd -default {wav_opts_proc["compression"]} \n')
+        elif wav_opts["type"] == "EVCD": f.write(f'database -open -evcd evcddb -into {wav_opts["dump_name"]}.evcd -default {wav_opts_proc["compression"]} \n')
+        elif wav_opts["type"] == "SHM":  f.write(f'database -open -shm shmdb -into {wav_opts["dump_name"]}.shm -event -default {wav_opts_proc["compression"]} {wav_opts_proc["shm_incr"]} \n')
+        if wav_opts_proc["probe_paths"] is not None: f.write(f'{wav_opts_proc["probe_paths"]}\n')
+        if wav_opts_proc["tcl_opts"] is not None:    f.write(f'{wav_opts_proc["tcl_opts"]}\n')
+
+      # Deposit gl values.
+      if formatted_deposit:
+        f.write("\n".join(formatted_deposit) + "\n")
+
+      # Create saif file if specified.
+      if saif_opts["mode"] is not None:
+        f.write(f'{self.generate_saif_tcl_cmd(sim_opts)}\n')
+
+      # Execute
+      f.write("run \n")
+
+      # Close databases and dumps properly.
+      f.write("dumpsaif -end \n")
+      f.write("database -close *db \n")
+      f.write("exit")
     return True
 
   def compile_xrun(self) -> bool:
@@ -387,7 +430,7 @@ class xcelium(HammerSimTool, CadenceTool):
 
     # Gather complation-only options
     xrun_opts     = self.extract_xrun_opts()[1]
-    compile_opts  = self.get_setting(f"{self.tool_config_prefix}.compile_opts", [])       
+    compile_opts  = list(self.cached_setting(f"{self.tool_config_prefix}.compile_opts", []))
     compile_opts.append("-logfile xrun_compile.log")
     if xrun_opts["mce"]: compile_opts.append(self.generate_mc_cmd())
     compile_opts  = ('COMPILE', compile_opts)
@@ -405,7 +448,7 @@ class xcelium(HammerSimTool, CadenceTool):
   def elaborate_xrun(self) -> bool: 
     xrun_opts = self.extract_xrun_opts()[1]
     sim_opts  = self.extract_sim_opts()[1]
-    elab_opts = self.get_setting(f"{self.tool_config_prefix}.elab_opts", [])
+    elab_opts = list(self.cached_setting(f"{self.tool_config_prefix}.elab_opts", []))
     elab_opts.append("-logfile xrun_elab.log")
     elab_opts.append("-glsperf")
     elab_opts.append("-genafile access.txt")  
@@ -436,8 +479,11 @@ class xcelium(HammerSimTool, CadenceTool):
     return True
 
   def sim_xrun(self) -> bool:
-    sim_opts  = self.extract_sim_opts()[1]
-    sim_cmd_opts = self.get_setting(f"{self.sim_input_prefix}.options", [])
+    # Extract everything once up front and hand it down to the file generators.
+    xrun_opts_proc          = self.extract_xrun_opts()[0]
+    sim_opts_proc, sim_opts = self.extract_sim_opts()
+    wav_opts_proc, wav_opts = self.extract_waveform_opts()
+    sim_cmd_opts = list(self.cached_setting(f"{self.sim_input_prefix}.options", []))
     sim_opts_removal  = ["tb_name", "input_files", "incdir"]
     xrun_opts_removal = ["enhanced_recompile", "mce"]
     sim_cmd_opts = ('SIMULATION', sim_cmd_opts)
@@ -448,11 +494,13 @@ class xcelium(HammerSimTool, CadenceTool):
     
     arg_file_path = self.generate_arg_file("xrun_sim.arg", "HAMMER-GEN XRUN SIM ARG FILE", [sim_cmd_opts],
                                            sim_opt_removal = sim_opts_removal,
-                                           xrun_opt_removal = xrun_opts_removal)    
+                                           xrun_opt_removal = xrun_opts_removal,
+                                           xrun_opts_proc = xrun_opts_proc,
+                                           sim_opts_proc = sim_opts_proc)
     args =[self.xcelium_bin]
     args.append(f"-R -f {arg_file_path} -input {self.sim_tcl_file}")
 
-    self.generate_sim_tcl() 
+    self.generate_sim_tcl(sim_opts, wav_opts_proc, wav_opts)
     self.update_submit_options()
     self.run_executable(args, cwd=self.run_dir)
     return True
@@ -2,24 +2,60 @@
 #
 #  See LICENSE for licence details.
 
-from hammer.vlsi import HammerTool, HammerToolStep, HammerToolHookAction, HierarchicalMode
-from hammer.utils import VerilogUtils
+from hammer.vlsi import HammerTool, HammerToolStep, HammerToolHookAction, HierarchicalMode, ILMStruct
 from hammer.vlsi import HammerSynthesisTool
 from hammer.logging import HammerVLSILogging
 from hammer.vlsi import MMMCCornerType
+from hammer.vlsi.constraints import MMMCCorner
 import hammer.tech as hammer_tech
 
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Pattern, Tuple
 
 import hammer.tech.specialcells
 from hammer.tech.specialcells import CellType, SpecialCell
 
 import os
+import re
+import mmap
+import hashlib
 import json
+import tempfile
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 
 from hammer.cadence.tool import CadenceTool
 
+# Names of the step methods, in order. retime_modules is inserted after init_environment when it is needed.
+_STEP_METHODS = (
+    "init_environment",
+    "syn_generic",
+    "syn_map",
+    "add_tieoffs",
+    "write_regs",
+    "generate_reports",
+    "write_outputs"
+)
+
+# Steps that only write files and leave the design database unchanged.
+# No checkpoint is written after them; resuming reuses the checkpoint from before them.
+_PURE_STEPS = frozenset(["write_regs", "generate_reports"])
+
+
+@lru_cache(maxsize=None)
+def _submodule_regex(submodules: Tuple[str, ...]) -> Pattern[bytes]:
+    r"""
+    Compiled regex matching the definition of any of the given modules, shared by every input file.
+    Like VerilogUtils.create_module_regex, the name must be followed by the optional parameter and port lists and a
+    semicolon, so a mention of a submodule in a comment of its parent is not taken for its definition.
+
+    >>> source = b"module top(input a);\n  // this module foo is hardened separately\n  foo f(.a(a));\nendmodule\nmodule foo(input a);\nendmodule\n"
+    >>> _submodule_regex(("foo",)).sub(b"", source)
+    b'module top(input a);\n  // this module foo is hardened separately\n  foo f(.a(a));\nendmodule\n\n'
+    """
+    names = b"|".join(re.escape(submodule.encode()) for submodule in submodules)
+    return re.compile(rb"\bmodule\s+(?:" + names + rb")\s*(?:#\s*\(.*?\))?\s*(?:\(.*?\))?\s*;.*?\bendmodule\b", flags=re.DOTALL)
+
 
 class Genus(HammerSynthesisTool, CadenceTool):
     @property
@@ -28,35 +64,41 @@ class Genus(HammerSynthesisTool, CadenceTool):
         return None
 
     def fill_outputs(self) -> bool:
+        # Build each output path once; they are used both for the outputs and for the existence checks.
+        all_cells_path = self.all_cells_path
+        all_regs_path = self.all_regs_path
+        mapped_sdc_path = self.mapped_sdc_path
+        output_sdf_path = self.output_sdf_path
+
         # Check that the regs paths were written properly if the write_regs step was run
-        self.output_seq_cells = self.all_cells_path
-        self.output_all_regs = self.all_regs_path
+        self.output_seq_cells = all_cells_path
+        self.output_all_regs = all_regs_path
         if self.ran_write_regs:
-            if not os.path.isfile(self.all_cells_path):
-                raise ValueError("Output find_regs_cells.json %s not found" % (self.all_cells_path))
+            if not os.path.isfile(all_cells_path):
+                raise ValueError("Output find_regs_cells.json %s not found" % (all_cells_path))
 
-            if not os.path.isfile(self.all_regs_path):
-                raise ValueError("Output find_regs_paths.json %s not found" % (self.all_regs_path))
-
-            if not self.process_reg_paths(self.all_regs_path):
+            if not self.process_reg_paths(all_regs_path):
                 self.logger.error("Failed to process all register paths")
+
+            if not os.path.isfile(all_regs_path):
+                raise ValueError("Output find_regs_paths.json %s not found" % (all_regs_path))
         else:
             self.logger.info("Did not run write_regs")
 
         # Check that the synthesis outputs exist if the synthesis run was successful
         mapped_v = self.mapped_hier_v_path if self.hierarchical_mode.is_nonleaf_hierarchical() else self.mapped_v_path
         self.output_files = [mapped_v]
-        self.output_sdc = self.mapped_sdc_path
-        self.sdf_file = self.output_sdf_path
+        self.output_sdc = mapped_sdc_path
+        self.sdf_file = output_sdf_path
         if self.ran_write_outputs:
             if not os.path.isfile(mapped_v):
                 raise ValueError("Output mapped verilog %s not found" % (mapped_v)) # better error?
 
-            if not os.path.isfile(self.mapped_sdc_path):
-                raise ValueError("Output SDC %s not found" % (self.mapped_sdc_path)) # better error?
+            if not os.path.isfile(mapped_sdc_path):
+                raise ValueError("Output SDC %s not found" % (mapped_sdc_path)) # better error?
 
-            if not os.path.isfile(self.output_sdf_path):
-                raise ValueError("Output SDF %s not found" % (self.output_sdf_path))
+            if not os.path.isfile(output_sdf_path):
+                raise ValueError("Output SDF %s not found" % (output_sdf_path))
         else:
             self.logger.info("Did not run write_outputs")
 
@@ -85,15 +127,7 @@ class Genus(HammerSynthesisTool, CadenceTool):
 
     @property
     def steps(self) -> List[HammerToolStep]:
-        steps_methods = [
-            self.init_environment,
-            self.syn_generic,
-            self.syn_map,
-            self.add_tieoffs,
-            self.write_regs,
-            self.generate_reports,
-            self.write_outputs
-        ]
+        steps_methods = [getattr(self, name) for name in _STEP_METHODS]
         if self.get_setting("synthesis.inputs.retime_modules"):
             steps_methods.insert(1, self.retime_modules)
         return self.make_steps_from_methods(steps_methods)
@@ -101,16 +135,104 @@ class Genus(HammerSynthesisTool, CadenceTool):
     def do_pre_steps(self, first_step: HammerToolStep) -> bool:
         assert super().do_pre_steps(first_step)
         # Reload from the last checkpoint if we're not starting over.
+        # A checkpoint left by an earlier run is used even if this run does not write checkpoints.
         if first_step != self.first_step:
-            self.verbose_append("read_db pre_{step}".format(step=first_step.name))
+            checkpoint = self.checkpoint_step_name(first_step)
+            if checkpoint is None:
+                self.logger.error("Cannot start from step {step}: no checkpoint from an earlier run was found in {run_dir}.".format(
+                    step=first_step.name, run_dir=self.run_dir))
+                return False
+            self.verbose_append("read_db pre_{step}".format(step=checkpoint))
         return True
 
     def do_between_steps(self, prev: HammerToolStep, next: HammerToolStep) -> bool:
         assert super().do_between_steps(prev, next)
-        # Write a checkpoint to disk.
-        self.verbose_append("write_db -to_file pre_{step}".format(step=next.name))
+        if not self.get_setting("synthesis.genus.write_checkpoints"):
+            return True
+        if self.follows_pure_step(prev, next):
+            # The database is the same as in the checkpoint before prev, which resuming from next falls back to.
+            # Remove any checkpoint an earlier run left here so that it is not read instead.
+            self.append("file delete -force pre_{step} pre_{step}.fingerprint".format(step=next.name))
+            return True
+        # Write a checkpoint to disk, stamped with a fingerprint of what it was built from.
+        # Whether to keep an existing checkpoint is decided in Tcl, so the script is the same whatever is on disk.
+        fingerprint = self.checkpoint_fingerprint()
+        # The old stamp is removed first so that a checkpoint left half-written by a failed run is never kept.
+        write_checkpoint = """file delete -force pre_{step}.fingerprint
+write_db -to_file pre_{step}
+set stamp [open pre_{step}.fingerprint w]; puts -nonewline $stamp {fingerprint}; close $stamp""".format(
+            step=next.name, fingerprint=fingerprint)
+        if self.get_setting("synthesis.genus.skip_unchanged_checkpoints"):
+            # Keep an existing checkpoint written by an earlier run from the same script and inputs.
+            self.append("""
+if {{ ![file exists pre_{step}] || [catch {{
+    set stamp [open pre_{step}.fingerprint r]; set previous [read $stamp]; close $stamp
+}}] || $previous ne "{fingerprint}" }} {{
+    {write_checkpoint}
+}}""".format(step=next.name, fingerprint=fingerprint, write_checkpoint=write_checkpoint.replace("\n", "\n    ")))
+        else:
+            self.append(write_checkpoint)
         return True
 
+    def follows_pure_step(self, prev: HammerToolStep, next: HammerToolStep) -> bool:
+        """
+        Check whether next directly follows prev in the main steps and prev is one of _PURE_STEPS.
+        Only then is the database before next the same as the one before prev.
+        Hook steps may change the database, so a hook before or after a pure step always gets a checkpoint.
+        """
+        if prev.name not in _PURE_STEPS:
+            return False
+        names = [s.name for s in self.steps]
+        if prev.name not in names:
+            return False
+        i = names.index(prev.name)
+        return i + 1 < len(names) and names[i + 1] == next.name
+
+    def checkpoint_fingerprint(self) -> str:
+        """
+        Fingerprint everything that determines the database at this point of the script, so that a checkpoint from an
+        earlier run is only kept while it is unchanged: the Genus version, the Tcl emitted so far (which carries the
+        settings), mmmc.tcl and the files it reads, and the files listed in rtl.f and lefs.f.
+        :return: Hex digest stored next to the checkpoint
+        """
+        def fingerprint_inputs() -> str:
+            paths = [os.path.join(self.run_dir, "mmmc.tcl")] + self.mmmc_input_files
+            for filelist in ("rtl.f", "lefs.f"):
+                filelist_path = os.path.join(self.run_dir, filelist)
+                if os.path.isfile(filelist_path):
+                    with open(filelist_path, "r") as f:
+                        paths.extend(f.read().splitlines())
+            inputs = hashlib.sha256()
+            self.fingerprint_files(inputs, paths)
+            return inputs.hexdigest()
+
+        fingerprint = hashlib.sha256(str(self.version()).encode())
+        fingerprint.update(self.run_cached("_checkpoint_inputs_fingerprint", fingerprint_inputs).encode())
+        fingerprint.update("\n".join(self.output).encode())
+        return fingerprint.hexdigest()
+
+    def checkpoint_step_name(self, step: HammerToolStep) -> Optional[str]:
+        """
+        Get the name of the step whose checkpoint holds the database state before the given step.
+        No checkpoint is written between a pure step and its direct follower in the main steps,
+        so the checkpoint may be one from before a run of pure steps.
+        A step that is not a main step, such as a hook, always has its own checkpoint.
+
+        :param step: Step to resume from
+        :return: Name of the step whose pre_<name> checkpoint in run_dir should be read, or None if there is none
+        """
+        candidates = [step.name]
+        names = [s.name for s in self.steps]
+        if step.name in names:
+            i = names.index(step.name)
+            while i > 0 and names[i - 1] in _PURE_STEPS:
+                i -= 1
+                candidates.append(names[i])
+        for name in candidates:
+            if os.path.exists(os.path.join(self.run_dir, "pre_" + name)):
+                return name
+        return None
+
     def do_post_steps(self) -> bool:
         assert super().do_post_steps()
         return self.run_genus()
@@ -122,7 +244,7 @@ class Genus(HammerSynthesisTool, CadenceTool):
     @property
     def mapped_hier_v_path(self) -> str:
         if self.version() >= self.version_number("191"):
-            return os.path.join(self.run_dir, "{top}_noilm.mapped.v".format(self.top_module))
+            return os.path.join(self.run_dir, "{top}_noilm.mapped.v".format(top=self.top_module))
         else:
             return os.path.join(self.run_dir, "genus_invs_des/genus.v.gz")
 
@@ -160,35 +282,132 @@ class Genus(HammerSynthesisTool, CadenceTool):
     def ran_write_outputs(self, val: bool) -> None:
         self.attr_setter("_ran_write_outputs", val)
 
-    def remove_hierarchical_submodules_from_file(self, path: str) -> str:
+    @property
+    def cached_input_ilms(self) -> List[ILMStruct]:
+        """The input ILMs, looked up once per tool run."""
+        return self.run_cached("_input_ilms", lambda: list(self.get_input_ilms()))
+
+    @property
+    def cached_mmmc_corners(self) -> List[MMMCCorner]:
+        """The MMMC corners, looked up once per tool run."""
+        return self.run_cached("_mmmc_corners", lambda: list(self.get_mmmc_corners()))
+
+    def remove_hierarchical_submodules_from_file(self, path: str, submodules: Optional[List[str]] = None,
+                                                 cache: Optional[Dict[str, Any]] = None) -> str:
         """
         Remove any hierarchical submodules' implementation from the given Verilog source file in path, if it is present.
         If it is not, return the original path.
         :param path: Path to verilog source file
+        :param submodules: Names of the modules to remove. Defaults to the modules of all input ILMs.
+        :param cache: Results of earlier calls, keyed by path. A result is reused if the file and submodules are unchanged.
         :return: A path to a modified version of the original file without the given module, or the same path as before.
         """
-        with open(path, "r") as f:
-            source = f.read()
-        submodules = list(map(lambda ilm: ilm.module, self.get_input_ilms()))
-
-        touched = False
-
-        for submodule in submodules:
-            if VerilogUtils.contains_module(source, submodule):
-                source = VerilogUtils.remove_module(source, submodule)
-                touched = True
-
-        if touched:
-            # Write the modified input to a new file in run_dir.
-            name, ext = os.path.splitext(os.path.basename(path))
-            new_filename = str(name) + "_no_submodules" + str(ext)
-            new_path = os.path.join(self.run_dir, new_filename)
-            with open(new_path, "w") as f:
-                f.write(source)
-            return new_path
-        else:
+        if submodules is None:
+            submodules = [ilm.module for ilm in self.cached_input_ilms]
+        if not submodules:
+            # Nothing to remove, so don't bother reading the file.
             return path
 
+        sorted_submodules = sorted(submodules)
+        if cache is None:
+            return self._strip_submodules(path, sorted_submodules)
+
+        mtime_ns = os.stat(path).st_mtime_ns
+        entry = cache.get(path)
+        if entry is not None and entry["mtime_ns"] == mtime_ns and entry["submodules"] == sorted_submodules \
+                and (entry["output"] == path or os.path.isfile(entry["output"])):
+            return entry["output"]
+        result = self._strip_submodules(path, sorted_submodules)
+        cache[path] = {"mtime_ns": mtime_ns, "submodules": sorted_submodules, "output": result}
+        return result
+
+    def _strip_submodules(self, path: str, submodules: List[str]) -> str:
+        """
+        Write a copy of the Verilog source file in path without the given modules to run_dir.
+        :param path: Path to verilog source file
+        :param submodules: Sorted names of the modules to remove
+        :return: Path to the copy, or the same path as before if none of the modules are in it
+        """
+        # Map the file rather than reading it, so that files without any of the submodules are never copied into memory.
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return path
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as source:
+                # Find all submodules in a single pass over the source instead of two scans per submodule.
+                spans = [m.span() for m in _submodule_regex(tuple(submodules)).finditer(source)]
+                if not spans:
+                    return path
+
+                # Write the parts of the input between the removed modules to a new file in run_dir.
+                # Inputs in different directories can share a basename, so tag the name with a hash of the full path.
+                name, ext = os.path.splitext(os.path.basename(path))
+                path_hash = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:8]
+                new_filename = "{}_{}_no_submodules{}".format(name, path_hash, ext)
+                new_path = os.path.join(self.run_dir, new_filename)
+                # Write to a unique temporary file first so that a partially written file is never picked up.
+                fd, tmp_path = tempfile.mkstemp(dir=self.run_dir, prefix=new_filename + ".", suffix=".tmp")
+                with os.fdopen(fd, "wb") as out, memoryview(source) as view:
+                    start = 0
+                    for span_start, span_end in spans:
+                        out.write(view[start:span_start])
+                        start = span_end
+                    out.write(view[start:])
+        os.replace(tmp_path, new_path)
+        return new_path
+
+    def append_filelist_read(self, var: str, paths: List[str], filelist: str) -> None:
+        """
+        Write paths to a file list and append Tcl that reads it back into a Tcl list.
+        This keeps syn.tcl small when there are many files.
+        :param var: Name of the Tcl variable to hold the list
+        :param paths: Paths to write, one per line
+        :param filelist: Path of the file list to write
+        """
+        self.write_contents_to_path("\n".join(paths), filelist)
+        self.append("set {var}_filelist [open {filelist}]".format(var=var, filelist=filelist))
+        self.append("set {var} [split [string trim [read ${var}_filelist]] \"\\n\"]".format(var=var))
+        self.append("close ${var}_filelist".format(var=var))
+
+    @property
+    def library_cache_dir(self) -> str:
+        """Directory next to run_dir, shared between runs, that holds cached library databases."""
+        return os.path.join(os.path.dirname(os.path.normpath(self.run_dir)), "genus_lib_cache")
+
+    def library_cache_fingerprint(self, mmmc_script: str, lef_files: List[str]) -> str:
+        """
+        Fingerprint the library setup inputs so that a cached library database is only reused while they are unchanged.
+        The Genus version and the Tcl emitted so far (the global set_db settings, clock gating setup, etc.) are
+        included, since the database also carries those root attributes.
+        :param mmmc_script: Contents of the mmmc script
+        :param lef_files: LEF files read after the mmmc script
+        :return: Hex digest used to name the cached database
+        """
+        fingerprint = hashlib.sha256(str(self.version()).encode())
+        fingerprint.update("\n".join(self.output).encode())
+        fingerprint.update(mmmc_script.encode())
+        self.fingerprint_files(fingerprint, self.mmmc_input_files + lef_files)
+        return fingerprint.hexdigest()
+
+    def fingerprint_files(self, fingerprint: "hashlib._Hash", paths: List[str]) -> None:
+        """
+        Add the given files to a fingerprint, skipping any path that is not a file.
+        Files in run_dir (e.g. the SDC fragments and the _no_submodules sources) are regenerated every run, so their
+        contents are hashed; any other file is identified by its size and modification time.
+        :param fingerprint: Hash object to update
+        :param paths: Files to add
+        """
+        run_dir = os.path.normpath(self.run_dir)
+        for path in paths:
+            if not os.path.isfile(path):
+                continue
+            fingerprint.update(path.encode())
+            if os.path.dirname(os.path.normpath(path)) == run_dir:
+                with open(path, "rb") as f:
+                    fingerprint.update(f.read())
+            else:
+                stat = os.stat(path)
+                fingerprint.update("{} {}".format(stat.st_size, stat.st_mtime_ns).encode())
+
     def init_environment(self) -> bool:
         # Python sucks here for verbosity
         verbose_append = self.verbose_append
@@ -206,36 +425,72 @@ class Genus(HammerSynthesisTool, CadenceTool):
         # Set up libraries.
         # Read timing libraries.
         mmmc_path = os.path.join(self.run_dir, "mmmc.tcl")
-        self.write_contents_to_path(self.generate_mmmc_script(), mmmc_path)
-        verbose_append("read_mmmc {mmmc_path}".format(mmmc_path=mmmc_path))
-
-        if self.hierarchical_mode.is_nonleaf_hierarchical():
-            # Read ILMs.
-            for ilm in self.get_input_ilms():
-                # Assumes that the ILM was created by Innovus (or at least the file/folder structure).
-                verbose_append("read_ilm -basename {data_dir}/{module}_postRoute -module_name {module}".format(
-                    data_dir=ilm.data_dir, module=ilm.module))
+        mmmc_script = self.generate_mmmc_script()
+        self.write_contents_to_path(mmmc_script, mmmc_path)
 
         # Read LEF layouts.
         lef_files = self.technology.read_libs([
             hammer_tech.filters.lef_filter
         ], hammer_tech.HammerTechnologyUtils.to_plain_item)
         if self.hierarchical_mode.is_nonleaf_hierarchical():
-            ilm_lefs = list(map(lambda ilm: ilm.lef, self.get_input_ilms()))
-            lef_files.extend(ilm_lefs)
-        verbose_append("read_physical -lef {{ {files} }}".format(
-            files=" ".join(lef_files)
-        ))
+            lef_files.extend(ilm.lef for ilm in self.cached_input_ilms)
+        self.append_filelist_read("lef_files", lef_files, os.path.join(self.run_dir, "lefs.f"))
+
+        if self.get_setting("synthesis.genus.libcache") and not self.hierarchical_mode.is_nonleaf_hierarchical():
+            # Reuse the library database written by an earlier run with identical library inputs, if there is one.
+            os.makedirs(self.library_cache_dir, exist_ok=True)
+            cache_db = os.path.join(self.library_cache_dir, self.library_cache_fingerprint(mmmc_script, lef_files))
+            self.append("""
+if {{ [file exists {cache_db}] }} {{
+    read_db {cache_db}
+}} else {{
+    read_mmmc {mmmc_path}
+    read_physical -lef $lef_files
+    # Write under a name unique to this Genus process and rename it into place, so that a crashed or concurrent
+    # run never leaves a partial database behind for later runs to read.
+    write_db -to_file {cache_db}.[pid].tmp
+    file rename -force {cache_db}.[pid].tmp {cache_db}
+}}""".format(cache_db=cache_db, mmmc_path=mmmc_path))
+        else:
+            verbose_append("read_mmmc {mmmc_path}".format(mmmc_path=mmmc_path))
+
+            if self.hierarchical_mode.is_nonleaf_hierarchical():
+                # Read ILMs.
+                for ilm in self.cached_input_ilms:
+                    # Assumes that the ILM was created by Innovus (or at least the file/folder structure).
+                    verbose_append("read_ilm -basename {data_dir}/{module}_postRoute -module_name {module}".format(
+                        data_dir=ilm.data_dir, module=ilm.module))
+
+            verbose_append("read_physical -lef $lef_files")
 
         # Load input files and check that they are all Verilog.
         if not self.check_input_files([".v", ".sv"]):
             return False
         # We are switching working directories and Genus still needs to find paths.
-        abspath_input_files = list(map(lambda name: os.path.join(os.getcwd(), name), self.input_files))  # type: List[str]
+        cwd = os.getcwd()
+        abspath_input_files = [os.path.join(cwd, name) for name in self.input_files]  # type: List[str]
 
         # If we are in hierarchical, we need to remove hierarchical sub-modules/sub-blocks.
-        if self.hierarchical_mode.is_nonleaf_hierarchical():
-            abspath_input_files = list(map(self.remove_hierarchical_submodules_from_file, abspath_input_files))
+        # Each file is handled independently, so process them concurrently.
+        if self.hierarchical_mode.is_nonleaf_hierarchical() and len(self.cached_input_ilms) > 0:
+            submodules = [ilm.module for ilm in self.cached_input_ilms]
+            # Files that have not changed since the last run keep their earlier results.
+            submodule_cache_path = os.path.join(self.run_dir, "submodule_cache.json")
+            try:
+                with open(submodule_cache_path, "r") as f:
+                    submodule_cache = json.load(f)  # type: Dict[str, Any]
+            except (OSError, ValueError):
+                submodule_cache = {}
+            # The work is mostly file I/O, so size the pool by the number of files rather than vlsi.core.max_threads.
+            with ThreadPoolExecutor(max_workers=max(1, min(16, len(abspath_input_files)))) as executor:
+                abspath_input_files = list(executor.map(
+                    lambda path: self.remove_hierarchical_submodules_from_file(path, submodules, submodule_cache),
+                    abspath_input_files))
+            # Write under a temporary name and rename it into place so that a killed run cannot leave a truncated cache.
+            submodule_cache_tmp_path = submodule_cache_path + ".tmp"
+            with open(submodule_cache_tmp_path, "w") as f:
+                json.dump(submodule_cache, f)
+            os.replace(submodule_cache_tmp_path, submodule_cache_path)
 
         # Add any verilog_synth wrappers (which are needed in some technologies e.g. for SRAMs) which need to be
         # synthesized.
@@ -244,13 +499,14 @@ class Genus(HammerSynthesisTool, CadenceTool):
         ], hammer_tech.HammerTechnologyUtils.to_plain_item)
 
         # Read the RTL.
-        verbose_append("read_hdl -sv {{ {} }}".format(" ".join(abspath_input_files)))
+        self.append_filelist_read("rtl_files", abspath_input_files, os.path.join(self.run_dir, "rtl.f"))
+        verbose_append("read_hdl -sv $rtl_files")
 
         # Elaborate/parse the RTL.
         verbose_append("elaborate {}".format(self.top_module))
         # Preserve submodules
         if self.hierarchical_mode.is_nonleaf_hierarchical():
-            for ilm in self.get_input_ilms():
+            for ilm in self.cached_input_ilms:
                 verbose_append("set_db module:{top}/{mod} .preserve true".format(top=self.top_module, mod=ilm.module))
         verbose_append("init_design -top {}".format(self.top_module))
 
@@ -262,7 +518,8 @@ class Genus(HammerSynthesisTool, CadenceTool):
         # Must be done after elaboration.
         verbose_append("set_units -capacitance 1.0pF")
         verbose_append("set_load_unit -picofarads 1")
-        verbose_append("set_units -time 1.0{}".format(self.get_time_unit().value_prefix + self.get_time_unit().unit))
+        time_unit = self.get_time_unit()
+        verbose_append("set_units -time 1.0{}".format(time_unit.value_prefix + time_unit.unit))
 
         # Set "don't use" cells.
         for l in self.generate_dont_use_commands():
@@ -297,6 +554,8 @@ class Genus(HammerSynthesisTool, CadenceTool):
         return True
 
     def add_tieoffs(self) -> bool:
+        verbose_append = self.verbose_append
+
         tie_hi_cells = self.technology.get_special_cell_by_type(CellType.TieHiCell)
         tie_lo_cells = self.technology.get_special_cell_by_type(CellType.TieLoCell)
         tie_hilo_cells = self.technology.get_special_cell_by_type(CellType.TieHiLoCell)
@@ -312,18 +571,18 @@ class Genus(HammerSynthesisTool, CadenceTool):
         tie_lo_cell = tie_lo_cells[0].name[0]
 
         # Limit "no delay description exists" warnings
-        self.verbose_append("set_db message:WSDF-201 .max_print 20")
-        self.verbose_append("set_db use_tiehilo_for_const duplicate")
+        verbose_append("set_db message:WSDF-201 .max_print 20")
+        verbose_append("set_db use_tiehilo_for_const duplicate")
 
         # If there is more than 1 corner or a certain type, use lib cells for only the active analysis view
-        corner_counts = Counter(list(map(lambda c: c.type, self.get_mmmc_corners())))
+        corner_counts = Counter(c.type for c in self.cached_mmmc_corners)
         if any(cnt>1 for cnt in corner_counts.values()):
-            self.verbose_append("set ACTIVE_VIEW [string map { .setup_view {} .hold_view {} .extra_view {} } [get_db analysis_view:[get_analysis_views] .name]]")
-            self.verbose_append("set HI_TIEOFF [get_db base_cell:{TIE_HI_CELL} .lib_cells -if {{ .library.default_opcond == $ACTIVE_VIEW }}]".format(TIE_HI_CELL=tie_hi_cell))
-            self.verbose_append("set LO_TIEOFF [get_db base_cell:{TIE_LO_CELL} .lib_cells -if {{ .library.default_opcond == $ACTIVE_VIEW }}]".format(TIE_LO_CELL=tie_lo_cell))
-            self.verbose_append("add_tieoffs -high $HI_TIEOFF -low $LO_TIEOFF -max_fanout 1 -verbose")
+            verbose_append("set ACTIVE_VIEW [string map { .setup_view {} .hold_view {} .extra_view {} } [get_db analysis_view:[get_analysis_views] .name]]")
+            verbose_append("set HI_TIEOFF [get_db base_cell:{TIE_HI_CELL} .lib_cells -if {{ .library.default_opcond == $ACTIVE_VIEW }}]".format(TIE_HI_CELL=tie_hi_cell))
+            verbose_append("set LO_TIEOFF [get_db base_cell:{TIE_LO_CELL} .lib_cells -if {{ .library.default_opcond == $ACTIVE_VIEW }}]".format(TIE_LO_CELL=tie_lo_cell))
+            verbose_append("add_tieoffs -high $HI_TIEOFF -low $LO_TIEOFF -max_fanout 1 -verbose")
         else:
-            self.verbose_append("add_tieoffs -high {HI_TIEOFF} -low {LO_TIEOFF} -max_fanout 1 -verbose".format(HI_TIEOFF=tie_hi_cell, LO_TIEOFF=tie_lo_cell))
+            verbose_append("add_tieoffs -high {HI_TIEOFF} -low {LO_TIEOFF} -max_fanout 1 -verbose".format(HI_TIEOFF=tie_hi_cell, LO_TIEOFF=tie_lo_cell))
         return True
 
     def generate_reports(self) -> bool:
@@ -348,13 +607,10 @@ class Genus(HammerSynthesisTool, CadenceTool):
         if self.hierarchical_mode.is_nonleaf_hierarchical() and self.version() >= self.version_number("191"):
             verbose_append("write_hdl -exclude_ilm > {}".format(self.mapped_hier_v_path))
         verbose_append("write_script > {}.mapped.scr".format(top))
-        corners = self.get_mmmc_corners()
-        if corners:
-            # First setup corner is default view
-            view_name="{cname}.setup_view".format(cname=next(filter(lambda c: c.type is MMMCCornerType.Setup, corners)).name)
-        else:
-            # TODO: remove hardcoded my_view string
-            view_name = "my_view"
+        corners = self.cached_mmmc_corners
+        # First setup corner is default view
+        # TODO: remove hardcoded my_view string
+        view_name = next(("{cname}.setup_view".format(cname=c.name) for c in corners if c.type is MMMCCornerType.Setup), "my_view")
         verbose_append("write_sdc -view {view} > {file}".format(view=view_name, file=self.mapped_sdc_path))
 
         verbose_append("write_sdf > {run_dir}/{top}.mapped.sdf".format(run_dir=self.run_dir, top=top))
@@ -370,15 +626,13 @@ class Genus(HammerSynthesisTool, CadenceTool):
         return True
 
     def run_genus(self) -> bool:
-        verbose_append = self.verbose_append
-
         """Close out the synthesis script and run Genus."""
         # Quit Genus.
-        verbose_append("quit")
+        self.verbose_append("quit")
 
         # Create synthesis script.
         syn_tcl_filename = os.path.join(self.run_dir, "syn.tcl")
-        self.write_contents_to_path("\n".join(self.output), syn_tcl_filename)
+        self.write_output_script(syn_tcl_filename)
 
         # Build args.
         args = [
@@ -411,7 +665,10 @@ def genus_global_settings(ht: HammerTool) -> bool:
 
     # Generic Settings
     verbose_append("set_db hdl_error_on_blackbox true")
-    verbose_append("set_db max_cpus_per_server {}".format(ht.get_setting("vlsi.core.max_threads")))
+    max_threads = int(ht.get_setting("vlsi.core.max_threads"))
+    verbose_append("set_db max_cpus_per_server {}".format(max_threads))
+    if ht.get_setting("synthesis.genus.super_threading") and max_threads > 1:
+        verbose_append("set_db super_thread_servers {localhost}")
 
     return True
 
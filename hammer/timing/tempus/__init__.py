@@ -247,7 +247,7 @@ class Tempus(HammerTimingTool, CadenceTool):
 
         # Write main dofile
         timing_script = os.path.join(self.run_dir, "timing.tcl")
-        self.write_contents_to_path("\n".join(self.output), timing_script)
+        self.write_output_script(timing_script)
 
         # Build args
         # TODO: enable Signoff ECO with -tso (-eco?) option